@@ -14,7 +14,10 @@ async def main():
     """ Main entry point to run bot."""
     bot: Bot = Bot(env_file_path=ENV_FILE_PATH)
     await bot.init()
-    await bot.run() 
+    try:
+        await bot.run()
+    finally:
+        await bot.querier.aclose()
 
 
 if __name__ == "__main__":
@@ -1,5 +1,7 @@
 import os
 import json
+import asyncio
+import functools
 import logging
 import ast
 import math
@@ -9,6 +11,7 @@ import logging
 from dotenv import load_dotenv
 from hashlib import sha256
 from base64 import b64decode
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass   
 from cosmpy.aerial.client import LedgerClient, NetworkConfig
 from cosmpy.aerial.tx import SigningCfg
@@ -35,6 +38,11 @@ READ_TIMEOUT = 10
 SUCCESS_CODE = 0
 RETRY_FAILURE_CODES = [4, 8]
 NOT_A_SKIP_VAL_CODE = 4
+RPC_WORKERS = 4
+
+# Blocking rpc calls are run on this pool so they 
+# overlap with each other and with the event loop
+RPC_EXECUTOR = ThreadPoolExecutor(max_workers=RPC_WORKERS)
 
 
 @dataclass
@@ -132,20 +140,23 @@ class Bot:
     
     async def run(self):
         print("Scanning Mempool...")
-        while True:
-            # Update the account balance
+        # Iterate through new mempool txs as the querier finds them
+        loop = asyncio.get_running_loop()
+        async for backrun_list in self.querier.subscribe_mempool():
+            # Update the account balance in the background while
+            # the new transactions are decoded and simulated
+            balance_job = None
             if self.reset:
-                account_balance, reset = self.querier.update_account_balance(
-                                                            client=self.client,
-                                                            wallet=self.wallet,
-                                                            denom=self.arb_denom,
-                                                            network_config=self.network_config
-                                                            )
-                if not reset:
-                    self.reset = reset
-                    self.account_balance = account_balance
-            # Query the mempool for new transactions, returns once new txs are found
-            backrun_list = self.querier.query_node_for_new_mempool_txs()
+                balance_job = loop.run_in_executor(
+                                    RPC_EXECUTOR,
+                                    functools.partial(
+                                        self.querier.update_account_balance,
+                                        client=self.client,
+                                        wallet=self.wallet,
+                                        denom=self.arb_denom,
+                                        network_config=self.network_config
+                                        )
+                                    )
             #print(f"{time.time()}: Found new transactions in mempool")
             start = time.time()
             pools_to_update = set[str]()
@@ -187,6 +198,12 @@ class Bot:
             end_update = time.time()
             logging.info(f"Time to update reserves: {end_update - start_update}")
 
+            if balance_job is not None:
+                account_balance, reset = await balance_job
+                if not reset:
+                    self.reset = reset
+                    self.account_balance = account_balance
+
             # Iterate through each profitable opportunities
             for (transaction, contracts_copy) in transactions_with_contracts:
                 # Build the most profitable bundle from 
@@ -201,21 +218,35 @@ class Bot:
                     # We only broadcast the bid transaction to the chain
                     # the bid transaction includes the bundle of transactions
                     # that will be executed if the bid is successful
-                    for bidTx in bidTxs:
-                        try:
-                            tx = self.client.broadcast_tx(tx=bidTx)
-                            logging.info(f"Broadcasted bid transaction {tx.tx_hash}")
-                        except Exception as e:
-                            logging.error(e)
+                    # The bids share an account sequence, so they are 
+                    # broadcast in order in a single background job
+                    await loop.run_in_executor(
+                                RPC_EXECUTOR,
+                                functools.partial(self._broadcast_bid_txs, bidTxs=bidTxs)
+                                )
                         
 
                     
+    def _broadcast_bid_txs(self, bidTxs: list[Tx]) -> None:
+        """ Broadcasts the bid transactions one after another,
+            the height + 1 bid always goes first.
+        """
+        for bidTx in bidTxs:
+            try:
+                tx = self.client.broadcast_tx(tx=bidTx)
+                logging.info(f"Broadcasted bid transaction {tx.tx_hash}")
+            except Exception as e:
+                logging.error(e)
+                    
     def build_most_profitable_bundle(self,
                                      transaction: Transaction,
                                      contracts: dict[str, Pool]) -> Tx:
         """ Build backrun bundle for transaction"""
-        # Calculate the profit for each route
+        # Calculate the profit for each route, skipping routes
+        # that are unprofitable at the margin, their profit stays 0
         for route in transaction.routes:
+            if not route.quick_marginal_profitable():
+                continue
             route.calculate_and_set_optimal_amount_in()
             route.calculate_and_set_amount_in(
                             account_balance=self.account_balance,
@@ -249,8 +280,11 @@ class Bot:
         logging.info(f"Tx Hash: {sha256(b64decode(transaction.tx_str)).hexdigest()}")
 
         address = str(self.wallet.address())
+        # Query the account and block height concurrently
+        account_job = RPC_EXECUTOR.submit(self.client.query_account, address=address)
+        height_job = RPC_EXECUTOR.submit(self.querier.query_block_height)
         try:
-            account = self.client.query_account(address=address)
+            account = account_job.result()
         except RuntimeError as e:
             logging.error(e)
             return None
@@ -302,7 +336,7 @@ class Bot:
             return bidTx;
 
         try:
-            height = self.querier.query_block_height()
+            height = height_job.result()
         except Exception as e:
             logging.error(e)
             return None
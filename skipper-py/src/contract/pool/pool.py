@@ -4,7 +4,7 @@ from abc import ABC, abstractmethod, abstractstaticmethod
 from cosmpy.aerial.wallet import LocalWallet
 
 from src.contract import Contract
-from src.swap import Swap
+from src.swap import Swap, FEE_SCALE, quantize_fee
 from src.querier import Querier
 
 
@@ -20,6 +20,10 @@ class Pool(Contract, ABC):
     lp_fee: float = 0.0
     protocol_fee: float = 0.0
     fee_from_input: bool = False
+    in_fee: float = 1.0
+    out_fee: float = 1.0
+    in_fee_q: int = FEE_SCALE
+    out_fee_q: int = FEE_SCALE
     routes: list[str] = field(default_factory=list)
 
     input_reserves: int = 0
@@ -139,6 +143,27 @@ class Pool(Contract, ABC):
         self.input_reserves = self.token2_reserves
         self.output_reserves = self.token1_reserves
         
+    def set_fees(self, 
+                 lp_fee: float, 
+                 protocol_fee: float, 
+                 fee_from_input: bool) -> None:
+        """ Sets the fees of the pool and precomputes the input
+            and output side fee multipliers used to calculate routes.
+            The float multipliers estimate the optimal amount in, 
+            the _q multipliers are integers scaled by FEE_SCALE 
+            for calculating exact amounts out.
+        """
+        self.lp_fee = lp_fee
+        self.protocol_fee = protocol_fee
+        self.fee_from_input = fee_from_input
+        swap_fee = 1 - (lp_fee + protocol_fee)
+        if fee_from_input:
+            self.in_fee, self.out_fee = swap_fee, 1.0
+        else:
+            self.in_fee, self.out_fee = 1.0, swap_fee
+        self.in_fee_q = quantize_fee(self.in_fee)
+        self.out_fee_q = quantize_fee(self.out_fee)
+        
     def set_input_output_vars(self, input_denom: str) -> None:
         """ Sets the input and output variables 
             based on the input denom.
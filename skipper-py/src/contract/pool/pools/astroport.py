@@ -11,7 +11,7 @@ class Astroport(Terraswap):
     DEFAULT_FEE_FROM_INPUT: float = False
 
     async def update_fees(self, querier: Querier) -> None:
-        self.lp_fee = self.DEFAULT_LP_FEE
-        self.protocol_fee = self.DEFAULT_PROTOCOL_FEE
-        self.fee_from_input = self.DEFAULT_FEE_FROM_INPUT
+        self.set_fees(lp_fee=self.DEFAULT_LP_FEE,
+                      protocol_fee=self.DEFAULT_PROTOCOL_FEE,
+                      fee_from_input=self.DEFAULT_FEE_FROM_INPUT)
 
@@ -60,9 +60,9 @@ class Junoswap(Pool):
             lp_fee = self.DEFAULT_LP_FEE
             protocol_fee = self.DEFAULT_PROTOCOL_FEE
             
-        self.lp_fee = lp_fee
-        self.protocol_fee = protocol_fee
-        self.fee_from_input = self.DEFAULT_FEE_FROM_INPUT
+        self.set_fees(lp_fee=lp_fee,
+                      protocol_fee=protocol_fee,
+                      fee_from_input=self.DEFAULT_FEE_FROM_INPUT)
 
     def get_swaps_from_message(self,
                                msg,
@@ -30,9 +30,10 @@ class Loop(Terraswap):
                                                     )
         fee_allocation = float(extra_commission_info["fee_allocation"])
         
-        self.protocol_fee = fee * (fee_allocation / 100)
-        self.lp_fee = fee - self.protocol_fee
-        self.fee_from_input = self.DEFAULT_FEE_FROM_INPUT
+        protocol_fee = fee * (fee_allocation / 100)
+        self.set_fees(lp_fee=fee - protocol_fee,
+                      protocol_fee=protocol_fee,
+                      fee_from_input=self.DEFAULT_FEE_FROM_INPUT)
     
     @staticmethod
     def get_query_fees_payload(contract_address: str, querier: Querier) -> dict:
@@ -11,6 +11,6 @@ class Phoenix(Terraswap):
     DEFAULT_FEE_FROM_INPUT: bool = False
     
     async def update_fees(self, querier: Querier):
-        self.lp_fee = self.DEFAULT_LP_FEE
-        self.protocol_fee = self.DEFAULT_PROTOCOL_FEE
-        self.fee_from_input = self.DEFAULT_FEE_FROM_INPUT
\ No newline at end of file
+        self.set_fees(lp_fee=self.DEFAULT_LP_FEE,
+                      protocol_fee=self.DEFAULT_PROTOCOL_FEE,
+                      fee_from_input=self.DEFAULT_FEE_FROM_INPUT)
\ No newline at end of file
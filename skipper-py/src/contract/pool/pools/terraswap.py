@@ -56,9 +56,9 @@ class Terraswap(Pool):
 
     async def update_fees(self, querier: Querier) -> None:
         """ Update the fees of the pool."""
-        self.lp_fee = self.DEFAULT_LP_FEE
-        self.protocol_fee = self.DEFAULT_PROTOCOL_FEE
-        self.fee_from_input = self.DEFAULT_FEE_FROM_INPUT
+        self.set_fees(lp_fee=self.DEFAULT_LP_FEE,
+                      protocol_fee=self.DEFAULT_PROTOCOL_FEE,
+                      fee_from_input=self.DEFAULT_FEE_FROM_INPUT)
 
     def get_swaps_from_message(self,
                                msg,
@@ -16,6 +16,6 @@ class Whitewhale(Terraswap):
                                         payload=payload,
                                         decoded=True
                                         )
-        self.lp_fee = float(fee_info["pool_fees"]["swap_fee"]['share'])
-        self.protocol_fee = float(fee_info["pool_fees"]["protocol_fee"]['share'])
-        self.fee_from_input = self.DEFAULT_FEE_FROM_INPUT
\ No newline at end of file
+        self.set_fees(lp_fee=float(fee_info["pool_fees"]["swap_fee"]['share']),
+                      protocol_fee=float(fee_info["pool_fees"]["protocol_fee"]['share']),
+                      fee_from_input=self.DEFAULT_FEE_FROM_INPUT)
\ No newline at end of file
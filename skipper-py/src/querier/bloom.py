@@ -0,0 +1,71 @@
+import math
+from hashlib import blake2b
+from dataclasses import dataclass
+
+
+@dataclass
+class BloomFilter:
+    """ Fixed size bloom filter used to dedup mempool txs.
+        Once capacity items have been added the filter rotates,
+        keeping the previous generation around so recently
+        seen items are still remembered.
+    """
+    capacity: int = 10_000
+    error_rate: float = 1e-4
+
+    def __post_init__(self):
+        self.num_bits: int = math.ceil(-self.capacity
+                                       * math.log(self.error_rate)
+                                       / math.log(2) ** 2)
+        self.num_hashes: int = max(1, round(self.num_bits
+                                            / self.capacity
+                                            * math.log(2)))
+        self.count: int = 0
+        self._current: bytearray = bytearray((self.num_bits + 7) // 8)
+        self._previous: bytearray = bytearray(len(self._current))
+
+    def __contains__(self, item: str) -> bool:
+        indexes = self._get_indexes(item)
+        return (self._has_all(self._current, indexes)
+                or self._has_all(self._previous, indexes))
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, item: str) -> bool:
+        """ Adds the item to the filter, hashing it only once.
+            Returns True if the item had not been seen before.
+        """
+        indexes = self._get_indexes(item)
+        if (self._has_all(self._current, indexes)
+            or self._has_all(self._previous, indexes)):
+            return False
+
+        if self.count >= self.capacity:
+            self._rotate()
+
+        for index in indexes:
+            self._current[index >> 3] |= 1 << (index & 7)
+        self.count += 1
+        return True
+
+    def _rotate(self) -> None:
+        """ Starts a new generation, dropping the oldest one."""
+        self._previous = self._current
+        self._current = bytearray(len(self._previous))
+        self.count = 0
+
+    def _get_indexes(self, item: str) -> list[int]:
+        """ Derives the bit indexes of the item from a single
+            128 bit digest using double hashing.
+        """
+        digest = blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits
+                for i in range(self.num_hashes)]
+
+    @staticmethod
+    def _has_all(bits: bytearray, indexes: list[int]) -> bool:
+        return all(bits[index >> 3] & (1 << (index & 7))
+                   for index in indexes)
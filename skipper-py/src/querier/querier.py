@@ -1,8 +1,11 @@
 from dataclasses import dataclass, field
+from typing import AsyncIterator
 from abc import ABC, abstractmethod, abstractstaticmethod
 from cosmpy.aerial.wallet import LocalWallet
 from cosmpy.aerial.client import LedgerClient
 
+from src.querier.bloom import BloomFilter
+
 
 @dataclass
 class Querier(ABC):
@@ -11,11 +14,17 @@ class Querier(ABC):
         Currently, queriers differ by chain / vm.
     """
     rpc_url: str
-    already_seen: set = field(default_factory=set)
+    already_seen: BloomFilter = field(default_factory=BloomFilter)
     update_tokens_jobs: list = field(default_factory=list)
     update_reserves_jobs: list = field(default_factory=list)
     update_fees_jobs: list = field(default_factory=list)
     
+    @abstractmethod
+    async def aclose(self) -> None:
+        """ This method is used to close any connections
+            held open to the node.
+        """
+    
     @abstractmethod
     async def query_node_and_return_response(self, 
                                              payload: dict, 
@@ -25,10 +34,16 @@ class Querier(ABC):
         """
 
     @abstractmethod
-    def query_node_for_new_mempool_txs(self) -> list[str]:
+    async def query_node_for_new_mempool_txs(self) -> list[str]:
         """ This method is used to query the node for new
             mempool transactions and return them.
         """
+    
+    @abstractmethod
+    def subscribe_mempool(self) -> AsyncIterator[list[str]]:
+        """ This method is used to continuously yield new
+            mempool transactions as they are found.
+        """
         
     @abstractstaticmethod
     def create_payload(contract_address: str, 
@@ -1,85 +1,257 @@
+import asyncio
+import functools
+import aiohttp
 import httpx
-import json
-from base64 import b16encode, b64decode
+import orjson
+from base64 import b64decode
 from cosmpy.protos.cosmwasm.wasm.v1.query_pb2 import (
     QuerySmartContractStateRequest,
     QuerySmartContractStateResponse)
 import logging
-import time
 import requests
 import datetime
+from dataclasses import dataclass
+from typing import AsyncIterator
 
 from cosmpy.aerial.client import LedgerClient
 from cosmpy.aerial.wallet import LocalWallet
 
 from src.querier.querier import Querier
 
+MEMPOOL_PROBES = 4
+MEMPOOL_PROBE_STAGGER = 0.25
+MEMPOOL_POLL_INTERVAL = 0.2
+MEMPOOL_MIN_POLL_INTERVAL = 0.05
+MEMPOOL_BUSY_DEPTH = 100
+MEMPOOL_WS_TIMEOUT = 5.0
+MEMPOOL_WS_RETRY_DELAY = 5.0
+MEMPOOL_WS_MAX_RETRY_DELAY = 60.0
 
+
+# Bound once to skip the attribute lookup on every decode
+_parse_smart_query_response = QuerySmartContractStateResponse.FromString
+
+
+@functools.lru_cache(maxsize=1024)
+def _decode_smart_query_response(value: str) -> dict:
+    """ Decodes the base64 abci_query response value into the
+        contract's json response. Cached since identical responses 
+        come back for repeated queries within a block, so the 
+        returned dict is shared and must not be mutated.
+    """
+    return orjson.loads(_parse_smart_query_response(b64decode(value)).data)
+
+
+@functools.lru_cache(maxsize=4096)
+def _encode_smart_query(contract_address: str, query_data: bytes) -> str:
+    """ Serializes and hex encodes a smart contract state request.
+        Cached since the same queries are sent to the same 
+        contracts every time reserves are refreshed.
+    """
+    data = QuerySmartContractStateRequest.SerializeToString(
+                QuerySmartContractStateRequest(
+                    address=contract_address, 
+                    query_data=query_data)
+                )
+    return data.hex()
+
+
+@dataclass
 class CosmWasmQuerier(Querier):
     """ CosmWasm VM implementation of the Querier class.
         Currently works for Juno and Terra 2.
     """
+    
+    def __post_init__(self):
+        # Long lived clients so connections to the rpc node
+        # are kept alive and reused between queries. Requests wait
+        # for a free connection without a pool timeout, since all
+        # state update jobs are fired at once
+        self._client: httpx.AsyncClient = httpx.AsyncClient(
+                                http2=True,
+                                limits=httpx.Limits(max_connections=64,
+                                                    max_keepalive_connections=32),
+                                timeout=httpx.Timeout(5.0, pool=None))
+        self._sync_client: httpx.Client = httpx.Client(
+                                http2=True,
+                                limits=httpx.Limits(max_keepalive_connections=8),
+                                timeout=httpx.Timeout(5.0, pool=None))
+        # Parse the rpc endpoints once instead of on every request
+        self._abci_url: httpx.URL = httpx.URL(self.rpc_url)
+        self._mempool_url: httpx.URL = httpx.URL(self.rpc_url + "unconfirmed_txs?limit=1000")
+        self._block_url: httpx.URL = httpx.URL(self.rpc_url + "block")
+        self._websocket_url: str = self.rpc_url.replace("http", "ws", 1) + "websocket"
+        
+    async def aclose(self) -> None:
+        """ Closes the connections held by the querier."""
+        await self._client.aclose()
+        self._sync_client.close()
 
     async def query_node_and_return_response(self, 
                                              payload: dict, 
                                              decoded: bool = True) -> dict:
         """Query node and decode response"""
-        async with httpx.AsyncClient() as client:
-            response = await client.post(self.rpc_url, json=payload)
+        response = await self._client.post(self._abci_url, json=payload)
+        # Parse the raw body once instead of going through response.json()
+        response_json = orjson.loads(response.content)
 
         if not decoded:
-            return response.json()
+            return response_json
 
-        return json.loads(QuerySmartContractStateResponse.FromString(
-                                b64decode(response.json()["result"]["response"]["value"])
-                                ).data.decode())
+        return _decode_smart_query_response(
+                    response_json["result"]["response"]["value"])
         
-    def query_node_for_new_mempool_txs(self) -> list[str]:
+    async def query_node_for_new_mempool_txs(self) -> list[str]:
         """ Queries the rpc node for new mempool txs
             continuously until new txs are found to 
-            be processed by the 
+            be processed by the bot. Each round fires
+            staggered mempool probes in parallel and
+            returns the first batch with unseen txs.
         """
+        poll_interval = MEMPOOL_POLL_INTERVAL
         while True:
             #print(f"{datetime.datetime.now()}: Querying node for new mempool txs...")
-            time.sleep(1)
-            
-            if len(self.already_seen) > 200:
-                self.already_seen.clear()
-            
-            response = self._query_unconfirmed_txs()
+            await asyncio.sleep(poll_interval)
             
-            if response is None:
-                continue
-            
-            mempool = self._get_mempool_from_response(response)
+            probes = [asyncio.create_task(
+                        self._probe_mempool(delay=i * MEMPOOL_PROBE_STAGGER))
+                      for i in range(MEMPOOL_PROBES)]
+            depth = 0
+            try:
+                for probe in asyncio.as_completed(probes):
+                    mempool = await probe
+                    
+                    if mempool is None or 'txs' not in mempool or not mempool['txs']:
+                        continue
+                    
+                    depth = max(depth, len(mempool['txs']))
+                    new_txs = self._get_new_txs(mempool['txs'])
+                    
+                    if new_txs:
+                        return new_txs
+            finally:
+                for probe in probes:
+                    probe.cancel()
             
-            if mempool is None or 'txs' not in mempool or not mempool['txs']:
+            poll_interval = self._get_poll_interval(depth)
+    
+    async def subscribe_mempool(self) -> AsyncIterator[list[str]]:
+        """ Yields batches of new mempool txs as they are found.
+            Tendermint's event bus has no mempool events, tm.event='Tx'
+            only fires once a tx is committed, so unconfirmed_txs is 
+            called over a persistent websocket connection instead of 
+            a new http request per poll. Falls back to http polling
+            while the websocket is unavailable, retrying it with
+            an exponential backoff.
+        """
+        request = orjson.dumps({"jsonrpc": "2.0",
+                                "id": 1,
+                                "method": "unconfirmed_txs",
+                                "params": {"limit": "1000"}}).decode("utf-8")
+        loop = asyncio.get_running_loop()
+        retry_delay = MEMPOOL_WS_RETRY_DELAY
+        while True:
+            try:
+                async with aiohttp.ClientSession() as session:
+                    # The timeout of ws_connect only bounds closing the
+                    # websocket, so the connect and upgrade are bounded here.
+                    # Replies with 1000 txs can exceed the default 4 MiB
+                    # message size, so it is uncapped like the http path
+                    ws = await asyncio.wait_for(
+                                session.ws_connect(self._websocket_url,
+                                                   max_msg_size=0),
+                                timeout=MEMPOOL_WS_TIMEOUT)
+                    # Closed explicitly since aiohttp 3.8 websockets 
+                    # are not async context managers once awaited
+                    try:
+                        poll_interval = MEMPOOL_POLL_INTERVAL
+                        while True:
+                            await ws.send_str(request)
+                            msg = await ws.receive(timeout=MEMPOOL_WS_TIMEOUT)
+                            
+                            if msg.type != aiohttp.WSMsgType.TEXT:
+                                raise aiohttp.ClientError(f"Websocket closed: {msg.type}")
+                            
+                            mempool = self._get_mempool_from_reply(orjson.loads(msg.data))
+                            retry_delay = MEMPOOL_WS_RETRY_DELAY
+                            txs = mempool.get('txs')
+                            
+                            if txs:
+                                poll_interval = self._get_poll_interval(len(txs))
+                                new_txs = self._get_new_txs(txs)
+                                
+                                if new_txs:
+                                    yield new_txs
+                            
+                            await asyncio.sleep(poll_interval)
+                    finally:
+                        await ws.close()
+            # Sending on a dropped connection raises a ConnectionError
+            # that older aiohttp versions do not wrap in a ClientError
+            except (aiohttp.ClientError, 
+                    ConnectionError, 
+                    asyncio.TimeoutError, 
+                    ValueError) as e:
+                logging.error(f"Websocket error {e}, polling over http for {retry_delay}s...")
+                retry_at = loop.time() + retry_delay
+                retry_delay = min(retry_delay * 2, MEMPOOL_WS_MAX_RETRY_DELAY)
+                while loop.time() < retry_at:
+                    yield await self.query_node_for_new_mempool_txs()
+    
+    @staticmethod
+    def _get_mempool_from_reply(reply) -> dict:
+        """ Returns the mempool from a json rpc reply, raising 
+            a ValueError if the node answered with an error.
+        """
+        if not isinstance(reply, dict) or "error" in reply:
+            raise ValueError(f"Invalid rpc reply {reply}")
+        
+        mempool = reply.get('result')
+        return mempool if isinstance(mempool, dict) else {}
+    
+    def _get_new_txs(self, txs: list[str]) -> list[str]:
+        """ Returns the txs that have not been seen yet
+            and marks them as seen.
+        """
+        new_txs = []
+        for tx in txs:
+            if not self.already_seen.add(tx):
                 continue
-            
-            new_txs = []
-            for tx in mempool['txs']:
-                if tx in self.already_seen:
-                    continue
-                self.already_seen.add(tx)
-                new_txs.append(tx)
-
-            if new_txs:
-                return new_txs
+            new_txs.append(tx)
+        return new_txs
+    
+    @staticmethod
+    def _get_poll_interval(depth: int) -> float:
+        """ Polls faster the deeper the mempool is, 
+            busy mempools are more likely to have new txs.
+        """
+        return max(MEMPOOL_MIN_POLL_INTERVAL,
+                   MEMPOOL_POLL_INTERVAL / (1 + depth // MEMPOOL_BUSY_DEPTH))
+    
+    async def _probe_mempool(self, delay: float) -> dict | None:
+        """ Waits for the delay and then queries the mempool."""
+        await asyncio.sleep(delay)
+        response = await self._query_unconfirmed_txs()
+        
+        if response is None:
+            return None
+        
+        return self._get_mempool_from_response(response)
     
     @staticmethod
     def _get_mempool_from_response(response) -> dict | None:
         try:
-            mempool = response.json()['result']
+            mempool = orjson.loads(response.content)['result']
             return mempool
-        except json.decoder.JSONDecodeError:
+        except orjson.JSONDecodeError:
             logging.error("JSON decode error, retrying...")
             return None
             
-    def _query_unconfirmed_txs(self) -> httpx.Response | None:
+    async def _query_unconfirmed_txs(self) -> httpx.Response | None:
         """ Queries the rpc node with the mempool endpoint
         """
         try:
-            response = httpx.get(self.rpc_url + "unconfirmed_txs?limit=1000") 
+            response = await self._client.get(self._mempool_url)
             return response
         except httpx.ConnectTimeout:
             logging.error("Timeout error, retrying...")
@@ -99,13 +271,12 @@ class CosmWasmQuerier(Querier):
                        query: dict, 
                        height: str = "") -> dict:
         """Creates the payload for an abci_query"""
-        data = QuerySmartContractStateRequest.SerializeToString(
-                    QuerySmartContractStateRequest(
-                        address=contract_address, 
-                        query_data=json.dumps(query).encode('utf-8'))
-                    )
+        # Sorting keys gives the same cache key for equal queries
+        data = _encode_smart_query(
+                    contract_address=contract_address, 
+                    query_data=orjson.dumps(query, option=orjson.OPT_SORT_KEYS))
         params = {"path": "/cosmwasm.wasm.v1.Query/SmartContractState",
-                  "data": b16encode(data).decode("utf-8"), "prove": False}
+                  "data": data, "prove": False}
         
         if height:
             params["height"] = height
@@ -138,7 +309,7 @@ class CosmWasmQuerier(Querier):
     def query_block_height(self) -> int:
         """ This method is used to query current block height.
         """
-        response = httpx.get(self.rpc_url + "block") 
-        block = response.json()
+        response = self._sync_client.get(self._block_url)
+        block = orjson.loads(response.content)
 
         return int(block["result"]["block"]["header"]["height"])
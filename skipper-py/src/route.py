@@ -6,10 +6,57 @@ from cosmpy.protos.cosmos.bank.v1beta1.tx_pb2 import MsgSend
 from cosmpy.protos.cosmos.base.v1beta1.coin_pb2 import Coin
 
 from src.contract import Pool
-from src.swap import Swap, calculate_swap
+from src.swap import Swap, calculate_amount_out
 
 
-@dataclass 
+def calculate_optimal_amount_in(a_1_2: int,
+                                a_2_1: int,
+                                a_2_3: int,
+                                a_3_2: int,
+                                a_3_1: int,
+                                a_1_3: int,
+                                r1: tuple[float, float, float],
+                                r2: tuple[float, float, float]) -> int:
+    """ Given the reserves of an ordered three pool route and
+        the input (r1) and output (r2) side fee multipliers of 
+        each pool, calculate the optimal amount to swap in. 
+        Variable names match https://arxiv.org/abs/2105.02784
+    """
+    r1_0, r1_1, r1_2 = r1
+    r2_0, r2_1, r2_2 = r2
+    # Closed form of reducing the route into a single virtual pool,
+    # a = a_in / e and a' = fee * a_out / e share the denominator e 
+    # so sqrt(r1_0 * r2_0 * a' * a) - a only needs one sqrt and divide
+    reserves_in = a_1_2 * a_2_3 * a_3_1
+    reserves_out = a_2_1 * a_3_2 * a_1_3
+    fees = r1_0 * r2_0 * r1_1 * r2_1 * r1_2 * r2_2
+    e = a_3_1 * (a_2_3 + r1_1 * r2_0 * a_2_1) + r1_1 * r1_2 * r2_1 * r2_1 * a_2_1 * a_3_2
+    
+    return math.floor((math.sqrt(fees * reserves_in * reserves_out) - reserves_in) 
+                      / (r1_0 * e))
+
+
+def calculate_optimal_amount_in_n_pools(reserves_in: list[int],
+                                        reserves_out: list[int],
+                                        in_fees: list[float],
+                                        out_fees: list[float]) -> int:
+    """ Given the reserves and fee multipliers of each pool in an
+        ordered cyclic route of any length, calculate the optimal 
+        amount to swap in by reducing the route pool by pool 
+        into a single virtual pool (https://arxiv.org/abs/2105.02784).
+    """
+    a = reserves_in[0]
+    a_prime = reserves_out[0]
+    for i in range(1, len(reserves_in)):
+        denominator = reserves_in[i] + (in_fees[i] * out_fees[i-1] * a_prime)
+        a = (a * reserves_in[i]) / denominator
+        a_prime = (in_fees[i] * out_fees[i] * a_prime * reserves_out[i]) / denominator
+    
+    return math.floor((math.sqrt(in_fees[0] * out_fees[0] * a_prime * a) - a) 
+                      / in_fees[0])
+
+
+@dataclass(slots=True, eq=False)
 class Route:
     pools: list[Pool] = field(default_factory=list)
     profit: int = 0
@@ -23,38 +70,33 @@ class Route:
         """Given a swap and self, reorder the self so that the
            swap is in the opposite direction of the self.
         """        
-        # Get the index of the pool swapped against in the route 
-        swapped_self_index = self.pools.index(
-                                contracts[swap.contract_address]
-                                )
+        # Get the index of the pool swapped against in the route,
+        # matching on address rather than comparing whole pools
+        swapped_self_index = next(i for i, pool in enumerate(self.pools)
+                                  if pool.contract_address == swap.contract_address)
         # Set our input denom to the output denom of the swap
         # We swap in the opposite direction as the original swap
         input_denom = swap.output_denom
         # Order the route based on the index of the swapped pool
-        match(swapped_self_index):
-            case 0:
-                self._order_first_pool(input_denom=input_denom, 
-                                       arb_denom=arb_denom)
-            case 1:
-                self._order_second_pool(contracts=contracts, 
-                                        input_denom=input_denom, 
-                                        arb_denom=arb_denom)
-            case 2:
-                self._order_last_pool(input_denom=input_denom, 
-                                      arb_denom=arb_denom)
+        if (swapped_self_index < len(self._ORDER_DISPATCH)
+            and self._ORDER_DISPATCH[swapped_self_index](self,
+                                                         contracts=contracts, 
+                                                         input_denom=input_denom, 
+                                                         arb_denom=arb_denom)):
+            self.pools.reverse()
 
     def _order_first_pool(self,
+                          contracts: dict,
                           input_denom: str,
-                          arb_denom: str):      
-        """ Order route based on 1st pool."""
-        if input_denom != arb_denom:
-            self.pools.reverse()
+                          arb_denom: str) -> bool:      
+        """ Order route based on 1st pool, returns if it must be reversed."""
+        return input_denom != arb_denom
             
     def _order_second_pool(self,
                            contracts: dict,
                            input_denom: str,
-                           arb_denom: str):
-        """ Order route based on 2nd pool."""
+                           arb_denom: str) -> bool:
+        """ Order route based on 2nd pool, returns if it must be reversed."""
         first_pool = self.pools[0]
         
         if first_pool.token1_denom != arb_denom:
@@ -62,76 +104,80 @@ class Route:
         else:
             output_denom = first_pool.token2_denom
 
-        if input_denom != output_denom:
-            self.pools.reverse()
+        return input_denom != output_denom
             
     def _order_last_pool(self,
+                         contracts: dict,
                          input_denom: str,
-                         arb_denom: str):
-        """ Order route based on 3rd pool."""
-        if input_denom == arb_denom:
-            self.pools.reverse()
+                         arb_denom: str) -> bool:
+        """ Order route based on 3rd pool, returns if it must be reversed."""
+        return input_denom == arb_denom
+    
+    # Order methods indexed by the position of the swapped pool
+    _ORDER_DISPATCH = (_order_first_pool, _order_second_pool, _order_last_pool)
+            
+    def quick_marginal_profitable(self) -> bool:
+        """ Cheap check if the route is profitable at the margin, 
+            the product of each pool's marginal rate after fees
+            (output_reserves / input_reserves * in_fee * out_fee) 
+            must exceed 1. Compared in float since it only prunes
+            routes, edge cases are settled by the optimal amount in.
+        """
+        rate = 1.0
+        for pool in self.pools:
+            if not pool.input_reserves:
+                return False
+            rate *= pool.output_reserves / pool.input_reserves * pool.in_fee * pool.out_fee
+        return rate > 1.0
             
     def calculate_and_set_profit(self) -> int:
         """ Calculate the profit of the self."""
         # Iterate through the pools and calculate the amount out
-        # until the last pool, then calculate and set the profit
-        for i, pool in enumerate(self.pools):
-            if i == 0:
-                pool.amount_in = self.amount_in
-            else:
-                pool.amount_in = self.pools[i-1].amount_out
-                
-            pool.amount_out, _, _ = calculate_swap(
-                                        reserves_in=pool.input_reserves,
-                                        reserves_out=pool.output_reserves,
-                                        amount_in=pool.amount_in,
-                                        lp_fee=pool.lp_fee,
-                                        protocol_fee=pool.protocol_fee,
-                                        fee_from_input=pool.fee_from_input
-                                        )
+        # until the last pool, then calculate and set the profit.
+        # The amount is carried in a local to avoid re-reading 
+        # the previous pool's attributes every iteration.
+        amount = self.amount_in
+        for pool in self.pools:
+            pool.amount_in = amount
+            amount = calculate_amount_out(
+                            reserves_in=pool.input_reserves,
+                            reserves_out=pool.output_reserves,
+                            amount_in=amount,
+                            in_fee=pool.in_fee_q,
+                            out_fee=pool.out_fee_q
+                            )
+            pool.amount_out = amount
         
-        self.profit = self.pools[-1].amount_out - self.pools[0].amount_in
+        self.profit = amount - self.amount_in
         return self.profit
     
     def calculate_and_set_optimal_amount_in(self) -> None:
         """Given an ordered route, calculates and sets the
            optimal amount to swap into the first pool, by 
            implementing this paper: https://arxiv.org/abs/2105.02784
-           for three pool cyclic arbitrage.
+           for cyclic arbitrage, specialized for three pools.
         """
-        # r1 and r2 are list of fees 
-        r1 = []
-        r2 = []
-        # Determine which pool the fees are taken from
-        for pool in self.pools:
-            if pool.fee_from_input:
-                r1.append(1 - (pool.lp_fee + pool.protocol_fee))
-                r2.append(1)
-            else:
-                r1.append(1)
-                r2.append(1 - (pool.lp_fee + pool.protocol_fee))
-        # Create varriable names that match the paper
-        a_1_2 = self.pools[0].input_reserves
-        a_2_1 = self.pools[0].output_reserves
-        a_2_3 = self.pools[1].input_reserves
-        a_3_2 = self.pools[1].output_reserves
-        a_3_1 = self.pools[2].input_reserves
-        a_1_3 = self.pools[2].output_reserves
-
-        a_prime_1_3 = ((a_1_2 * a_2_3) 
-                      / (a_2_3 + (r1[1] * r2[0] * a_2_1)))
-        a_prime_3_1 = ((r1[1] * r2[1] * a_2_1 * a_3_2) 
-                      / (a_2_3 + (r1[1] * r2[0] * a_2_1)))
-
-        a = ((a_prime_1_3 * a_3_1) 
-            / (a_3_1 + (r1[2] * r2[1] * a_prime_3_1)))
-        a_prime = ((r1[2] * r2[2] * a_1_3 * a_prime_3_1) 
-                  / (a_3_1 + (r1[2] * r2[1] * a_prime_3_1)))
+        if len(self.pools) != 3:
+            self.optimal_amount_in = calculate_optimal_amount_in_n_pools(
+                                        reserves_in=[pool.input_reserves for pool in self.pools],
+                                        reserves_out=[pool.output_reserves for pool in self.pools],
+                                        in_fees=[pool.in_fee for pool in self.pools],
+                                        out_fees=[pool.out_fee for pool in self.pools]
+                                        )
+            return
+        
+        pool_0, pool_1, pool_2 = self.pools[0], self.pools[1], self.pools[2]
         # Set optimal amount in
-        self.optimal_amount_in = math.floor(
-                                    (math.sqrt(r1[0] * r2[0] * a_prime * a) - a) 
-                                    / (r1[0]))
+        self.optimal_amount_in = calculate_optimal_amount_in(
+                                    a_1_2=pool_0.input_reserves,
+                                    a_2_1=pool_0.output_reserves,
+                                    a_2_3=pool_1.input_reserves,
+                                    a_3_2=pool_1.output_reserves,
+                                    a_3_1=pool_2.input_reserves,
+                                    a_1_3=pool_2.output_reserves,
+                                    r1=(pool_0.in_fee, pool_1.in_fee, pool_2.in_fee),
+                                    r2=(pool_0.out_fee, pool_1.out_fee, pool_2.out_fee)
+                                    )
     
     def calculate_and_set_amount_in(self,
                                     account_balance: int,
@@ -1,6 +1,9 @@
 import math
 from dataclasses import dataclass
 
+# Fixed point scale of the fee multipliers used in route math
+FEE_SCALE = 10**12
+
 
 @dataclass
 class Swap:
@@ -39,4 +42,30 @@ def calculate_swap(reserves_in: int,
         amount_out = math.floor(reserves_out - (k / (reserves_in + (amount_in))))
         new_reserves_in = reserves_in + amount_in
         new_reserves_out = reserves_out - math.floor(amount_out*lp_swap_fee)
-        return math.floor(amount_out*total_swap_fee), new_reserves_in, new_reserves_out
\ No newline at end of file
+        return math.floor(amount_out*total_swap_fee), new_reserves_in, new_reserves_out
+
+
+def quantize_fee(fee_multiplier: float) -> int:
+    """ Converts a fee multiplier into an integer scaled by FEE_SCALE."""
+    return round(fee_multiplier * FEE_SCALE)
+
+
+def calculate_amount_out(reserves_in: int, 
+                         reserves_out: int, 
+                         amount_in: int, 
+                         in_fee: int, 
+                         out_fee: int) -> int:
+    """ Given a pool's reserves, its input and output side fee 
+        multipliers scaled by FEE_SCALE and an amount to swap in,
+        calculate and return the amount out using integer math.
+        Matches the amount out of calculate_swap without 
+        computing the new reserves.
+    """
+    if amount_in <= 0:
+        return 0
+    # reserves_out - k / (reserves_in + amount_in) simplifies to
+    # reserves_out * amount_in / (reserves_in + amount_in)
+    amount_in_after_fee = amount_in * in_fee
+    amount_out = (reserves_out * amount_in_after_fee 
+                  // (reserves_in * FEE_SCALE + amount_in_after_fee))
+    return amount_out * out_fee // FEE_SCALE
\ No newline at end of file
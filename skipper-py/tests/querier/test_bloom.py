@@ -0,0 +1,42 @@
+from src.querier.bloom import BloomFilter
+
+class TestBloomFilter:
+
+    @staticmethod
+    def test_add_and_contains():
+        """ Tests that added items are reported as seen
+            and that add reports whether the item was new.
+        """
+        bloom = BloomFilter()
+        assert "tx_0" not in bloom
+        assert bloom.add("tx_0")
+        assert "tx_0" in bloom
+        assert not bloom.add("tx_0")
+        assert len(bloom) == 1
+
+    @staticmethod
+    def test_rotation_keeps_previous_generation():
+        """ Tests that items from the previous generation are
+            still seen after the filter rotates, and dropped
+            after a second rotation.
+        """
+        bloom = BloomFilter(capacity=10)
+        for i in range(10):
+            bloom.add(f"tx_{i}")
+        bloom.add("tx_10")
+        assert len(bloom) == 1
+        assert "tx_0" in bloom
+        for i in range(11, 21):
+            bloom.add(f"tx_{i}")
+        assert "tx_0" not in bloom
+
+    @staticmethod
+    def test_false_positive_rate():
+        """ Tests that the false positive rate stays close to
+            the configured error rate at capacity.
+        """
+        bloom = BloomFilter(capacity=2_000, error_rate=1e-3)
+        for i in range(2_000):
+            bloom.add(f"seen_{i}")
+        false_positives = sum(f"unseen_{i}" in bloom for i in range(10_000))
+        assert false_positives < 50
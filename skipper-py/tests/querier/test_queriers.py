@@ -1,6 +1,81 @@
+import asyncio
+import logging
 import pytest
+import httpx
+import orjson
+from aiohttp import web
+from contextlib import asynccontextmanager
+from cosmpy.protos.cosmwasm.wasm.v1.query_pb2 import QuerySmartContractStateRequest
 
 from src.querier import Querier, CosmWasmQuerier
+from src.querier.queriers import cosmwasm
+
+
+def mempool_response(txs: list[str]) -> dict:
+    return {"jsonrpc": "2.0", "id": 1, "result": {"n_txs": str(len(txs)), "txs": txs}}
+
+
+async def create_querier(rpc_url: str, batches: list[list[str]]) -> tuple[CosmWasmQuerier, list]:
+    """ Creates a querier whose http mempool queries are answered 
+        by a mock transport, returning each batch in turn.
+        Returns the querier and the list of requests it made.
+    """
+    requests = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        txs = batches[min(len(requests), len(batches)) - 1]
+        return httpx.Response(200, json=mempool_response(txs))
+    
+    querier = CosmWasmQuerier(rpc_url=rpc_url)
+    await querier._client.aclose()
+    querier._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return querier, requests
+
+
+@asynccontextmanager
+async def serve_websocket(reply, abort_after: int | None = None):
+    """ Serves a websocket rpc endpoint that answers each request
+        with reply(), yields the rpc url and the number of 
+        websocket connections made. If abort_after is set the
+        connection is dropped after that many replies.
+    """
+    connections = []
+    
+    async def websocket_handler(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        connections.append(ws)
+        replies = 0
+        async for _ in ws:
+            await ws.send_str(orjson.dumps(reply()).decode("utf-8"))
+            replies += 1
+            if replies == abort_after:
+                request.transport.abort()
+                break
+        return ws
+    
+    app = web.Application()
+    app.router.add_get("/websocket", websocket_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    try:
+        yield f"http://127.0.0.1:{port}/", connections
+    finally:
+        await runner.cleanup()
+
+
+@pytest.fixture
+def fast_mempool(monkeypatch):
+    """ Shortens the mempool polling intervals and timeouts."""
+    monkeypatch.setattr(cosmwasm, "MEMPOOL_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(cosmwasm, "MEMPOOL_MIN_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(cosmwasm, "MEMPOOL_WS_TIMEOUT", 0.2)
+    monkeypatch.setattr(cosmwasm, "MEMPOOL_WS_RETRY_DELAY", 60.0)
+
 
 class TestCosmWasmQuerier:
     
@@ -20,4 +95,159 @@ class TestCosmWasmQuerier:
         querier = CosmWasmQuerier(rpc_url="")
         assert isinstance(querier, Querier)
         
-    
\ No newline at end of file
+    @staticmethod
+    def test_create_payload():
+        """ Tests that create_payload encodes the smart query
+            and that equal queries share the same encoding.
+        """
+        payload = CosmWasmQuerier.create_payload(
+                        contract_address="juno1contract",
+                        query={"pairs": {"limit": 30, "start_after": []}},
+                        height="100")
+        request = QuerySmartContractStateRequest.FromString(
+                        bytes.fromhex(payload["params"]["data"]))
+        assert request.address == "juno1contract"
+        assert orjson.loads(request.query_data) == {"pairs": {"limit": 30, "start_after": []}}
+        assert payload["params"]["height"] == "100"
+        
+        reordered = CosmWasmQuerier.create_payload(
+                        contract_address="juno1contract",
+                        query={"pairs": {"start_after": [], "limit": 30}})
+        assert reordered["params"]["data"] == payload["params"]["data"]
+        assert "height" not in reordered["params"]
+        
+    @staticmethod
+    @pytest.mark.parametrize(argnames="depth, poll_interval",
+                             argvalues=[(0, cosmwasm.MEMPOOL_POLL_INTERVAL),
+                                        (99, cosmwasm.MEMPOOL_POLL_INTERVAL),
+                                        (100, cosmwasm.MEMPOOL_POLL_INTERVAL / 2),
+                                        (10_000, cosmwasm.MEMPOOL_MIN_POLL_INTERVAL)])
+    def test_get_poll_interval(depth, poll_interval):
+        """ Tests that the poll interval shrinks as the mempool 
+            gets deeper, down to the minimum interval.
+        """
+        assert CosmWasmQuerier._get_poll_interval(depth) == poll_interval
+        
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_query_node_for_new_mempool_txs(fast_mempool):
+        """ Tests that the first probe with new txs wins the round
+            and that the staggered probes still pending are cancelled.
+        """
+        querier, requests = await create_querier("http://rpc/", [["tx_0", "tx_1"]])
+        
+        new_txs = await querier.query_node_for_new_mempool_txs()
+        await asyncio.sleep(cosmwasm.MEMPOOL_PROBE_STAGGER * cosmwasm.MEMPOOL_PROBES)
+        
+        assert new_txs == ["tx_0", "tx_1"]
+        assert len(requests) == 1
+        assert requests[0].url == "http://rpc/unconfirmed_txs?limit=1000"
+        await querier.aclose()
+        
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_query_node_for_new_mempool_txs_skips_seen(fast_mempool):
+        """ Tests that already seen txs are not returned again."""
+        querier, requests = await create_querier("http://rpc/", [["tx_0"], 
+                                                                 ["tx_0", "tx_1"]])
+        querier.already_seen.add("tx_0")
+        
+        new_txs = await querier.query_node_for_new_mempool_txs()
+        
+        assert new_txs == ["tx_1"]
+        assert len(requests) == 2
+        await querier.aclose()
+        
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_subscribe_mempool(fast_mempool):
+        """ Tests that new txs are yielded from the websocket
+            without falling back to http polling.
+        """
+        replies = iter([["tx_0"], ["tx_0"], ["tx_0", "tx_1"]])
+        async with serve_websocket(lambda: mempool_response(next(replies, []))) as (rpc_url, connections):
+            querier, requests = await create_querier(rpc_url, [["http_tx"]])
+            mempool = querier.subscribe_mempool()
+            
+            assert await asyncio.wait_for(anext(mempool), 2) == ["tx_0"]
+            assert await asyncio.wait_for(anext(mempool), 2) == ["tx_1"]
+            assert len(connections) == 1
+            assert not requests
+            await mempool.aclose()
+            await querier.aclose()
+            
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_subscribe_mempool_falls_back_on_rpc_error(fast_mempool, caplog):
+        """ Tests that an rpc error reply is logged and falls back 
+            to http polling, staying on http until the retry delay.
+        """
+        error = {"jsonrpc": "2.0", "id": 1, 
+                 "error": {"code": -32602, "message": "Invalid params"}}
+        async with serve_websocket(lambda: error) as (rpc_url, connections):
+            querier, requests = await create_querier(rpc_url, [["http_tx_0"], 
+                                                               ["http_tx_1"]])
+            mempool = querier.subscribe_mempool()
+            
+            with caplog.at_level(logging.ERROR):
+                assert await asyncio.wait_for(anext(mempool), 2) == ["http_tx_0"]
+                assert await asyncio.wait_for(anext(mempool), 2) == ["http_tx_1"]
+            
+            assert len(connections) == 1
+            assert len([r for r in caplog.records if "Websocket error" in r.message]) == 1
+            await mempool.aclose()
+            await querier.aclose()
+    
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_subscribe_mempool_falls_back_on_stalled_upgrade(fast_mempool):
+        """ Tests that a node accepting connections but never
+            finishing the websocket upgrade falls back to polling.
+        """
+        async def stall(reader, writer):
+            await reader.read()
+            writer.close()
+        
+        server = await asyncio.start_server(stall, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        querier, _ = await create_querier(f"http://127.0.0.1:{port}/", [["http_tx"]])
+        mempool = querier.subscribe_mempool()
+        
+        assert await asyncio.wait_for(anext(mempool), 2) == ["http_tx"]
+        await mempool.aclose()
+        await querier.aclose()
+        server.close()
+        
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_subscribe_mempool_falls_back_on_dropped_connection(fast_mempool):
+        """ Tests that the node dropping the connection mid session
+            falls back to http polling instead of raising.
+        """
+        replies = iter([["tx_0"]])
+        async with serve_websocket(lambda: mempool_response(next(replies, [])),
+                                   abort_after=1) as (rpc_url, connections):
+            querier, _ = await create_querier(rpc_url, [["http_tx"]])
+            mempool = querier.subscribe_mempool()
+            
+            assert await asyncio.wait_for(anext(mempool), 2) == ["tx_0"]
+            assert await asyncio.wait_for(anext(mempool), 2) == ["http_tx"]
+            await mempool.aclose()
+            await querier.aclose()
+            
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_subscribe_mempool_large_reply(fast_mempool):
+        """ Tests that replies over aiohttp's default 4 MiB message
+            size are still read from the websocket.
+        """
+        txs = [f"{i:04d}" + "A" * 8_000 for i in range(1000)]
+        replies = iter([txs])
+        async with serve_websocket(lambda: mempool_response(next(replies, []))) as (rpc_url, _):
+            querier, requests = await create_querier(rpc_url, [["http_tx"]])
+            mempool = querier.subscribe_mempool()
+            
+            assert await asyncio.wait_for(anext(mempool), 5) == txs
+            assert not requests
+            await mempool.aclose()
+            await querier.aclose()
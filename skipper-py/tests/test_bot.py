@@ -0,0 +1,22 @@
+from types import SimpleNamespace
+
+from src.bot import Bot
+
+
+def test_broadcast_bid_txs_in_order():
+    """ Tests that bid transactions sharing a sequence are broadcast
+        in order and that a failed broadcast does not stop the rest.
+    """
+    broadcasted = []
+
+    def broadcast_tx(tx):
+        broadcasted.append(tx)
+        if tx == "bid_height_1":
+            raise RuntimeError("account sequence mismatch")
+        return SimpleNamespace(tx_hash=tx)
+
+    bot = Bot(env_file_path="")
+    bot.client = SimpleNamespace(broadcast_tx=broadcast_tx)
+    bot._broadcast_bid_txs(bidTxs=["bid_height_1", "bid_height_2"])
+
+    assert broadcasted == ["bid_height_1", "bid_height_2"]
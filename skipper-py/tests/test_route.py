@@ -1,8 +1,11 @@
 import pytest
+from types import SimpleNamespace
 
-from src.route import Route 
+from src.bot import Bot
+from src.route import Route, calculate_optimal_amount_in, calculate_optimal_amount_in_n_pools
 from src.contract.pool.pool import Pool
 from src.contract.pool.pools import Junoswap
+from src.swap import Swap
 
 def get_routes():
     """ Get a route object from a list of pools."""
@@ -12,27 +15,21 @@ def get_routes():
     pool_0_0 = Junoswap(
                     contract_address="juno1wuu8nwr37kmg0njg6p3ag7j4qcm08vs6z9e9j28aendnfnuxmd3sc4yrhm",
                     protocol="junoswap")
-    pool_0_0.lp_fee = 0.003
-    pool_0_0.protocol_fee = 0.0
-    pool_0_0.fee_from_input = True 
+    pool_0_0.set_fees(lp_fee=0.003, protocol_fee=0.0, fee_from_input=True)
     pool_0_0.input_reserves = 1123316675
     pool_0_0.output_reserves = 3613270652670102
     
     pool_0_1 = Junoswap(
                     contract_address="juno1dug89d22vtu7v27ee9gg4xq5seu2tu705d6eh3kmvh0uvy7depaqg45qdj",
                     protocol="junoswap")
-    pool_0_1.lp_fee = 0.003
-    pool_0_1.protocol_fee = 0.0
-    pool_0_1.fee_from_input = True 
+    pool_0_1.set_fees(lp_fee=0.003, protocol_fee=0.0, fee_from_input=True)
     pool_0_1.input_reserves = 1057419056388265
     pool_0_1.output_reserves = 300719637958981152
     
     pool_0_2 = Junoswap(
                     contract_address="juno19859m5x8kgepwafc3h0n36kz545ngc2vlqnqxx7gx3t2kguv6fws93cu25",
                     protocol="junoswap")
-    pool_0_2.lp_fee = 0.003
-    pool_0_2.protocol_fee = 0.0
-    pool_0_2.fee_from_input = True 
+    pool_0_2.set_fees(lp_fee=0.003, protocol_fee=0.0, fee_from_input=True)
     pool_0_2.input_reserves = 79596744230120034
     pool_0_2.output_reserves = 169889474
     
@@ -43,9 +40,7 @@ def get_routes():
     pool_1_0 = Junoswap(
                     contract_address="juno1wuu8nwr37kmg0njg6p3ag7j4qcm08vs6z9e9j28aendnfnuxmd3sc4yrhm",
                     protocol="junoswap")
-    pool_1_0.lp_fee = 0.002
-    pool_1_0.protocol_fee = 0.0
-    pool_1_0.fee_from_input = True 
+    pool_1_0.set_fees(lp_fee=0.002, protocol_fee=0.0, fee_from_input=True)
     pool_1_0.input_reserves = 191801648570
     pool_1_0.output_reserves = 18986995439401
     
@@ -53,18 +48,14 @@ def get_routes():
     pool_1_1 = Junoswap(
                     contract_address="juno1dug89d22vtu7v27ee9gg4xq5seu2tu705d6eh3kmvh0uvy7depaqg45qdj",
                     protocol="junoswap")
-    pool_1_1.lp_fee = 0.00535
-    pool_1_1.protocol_fee = 0.0
-    pool_1_1.fee_from_input = True 
+    pool_1_1.set_fees(lp_fee=0.00535, protocol_fee=0.0, fee_from_input=True)
     pool_1_1.input_reserves = 596032233203
     pool_1_1.output_reserves = 72765460003038
     
     pool_1_2 = Junoswap(
                     contract_address="juno19859m5x8kgepwafc3h0n36kz545ngc2vlqnqxx7gx3t2kguv6fws93cu25",
                     protocol="junoswap")
-    pool_1_2.lp_fee = 0.002
-    pool_1_2.protocol_fee = 0.0
-    pool_1_2.fee_from_input = True 
+    pool_1_2.set_fees(lp_fee=0.002, protocol_fee=0.0, fee_from_input=True)
     pool_1_2.input_reserves = 165624820984787
     pool_1_2.output_reserves = 13901565323
     
@@ -76,4 +67,117 @@ def get_routes():
 def test_calculate_and_set_optimal_amount_in(route: Route, optimal_amount_in: int):
     route.calculate_and_set_optimal_amount_in()
     print(route.optimal_amount_in)
-    assert route.optimal_amount_in >= optimal_amount_in
\ No newline at end of file
+    assert route.optimal_amount_in >= optimal_amount_in
+
+def test_calculate_optimal_amount_in():
+    """ Osmosis mainnet arb route with fees taken from the input side."""
+    optimal_amount_in = calculate_optimal_amount_in(
+                            a_1_2=191801648570,
+                            a_2_1=18986995439401,
+                            a_2_3=596032233203,
+                            a_3_2=72765460003038,
+                            a_3_1=165624820984787,
+                            a_1_3=13901565323,
+                            r1=(1 - 0.002, 1 - 0.00535, 1 - 0.002),
+                            r2=(1, 1, 1))
+    assert optimal_amount_in >= 10126390
+
+
+@pytest.mark.parametrize(argnames="route,optimal_amount_in", argvalues=get_routes())
+def test_calculate_optimal_amount_in_n_pools(route: Route, optimal_amount_in: int):
+    """ Tests that the general n pool reduction agrees with the
+        closed form three pool calculation.
+    """
+    route.calculate_and_set_optimal_amount_in()
+    n_pools_optimal_amount_in = calculate_optimal_amount_in_n_pools(
+                                    reserves_in=[pool.input_reserves for pool in route.pools],
+                                    reserves_out=[pool.output_reserves for pool in route.pools],
+                                    in_fees=[pool.in_fee for pool in route.pools],
+                                    out_fees=[pool.out_fee for pool in route.pools])
+    assert n_pools_optimal_amount_in >= optimal_amount_in
+    assert n_pools_optimal_amount_in == pytest.approx(route.optimal_amount_in, rel=1e-9)
+
+
+
+@pytest.mark.parametrize(argnames="route,optimal_amount_in", argvalues=get_routes())
+def test_quick_marginal_profitable(route: Route, optimal_amount_in: int):
+    """ Tests that the marginal check agrees with the sign of 
+        the optimal amount in.
+    """
+    route.calculate_and_set_optimal_amount_in()
+    assert route.quick_marginal_profitable() == (route.optimal_amount_in > 0)
+
+
+def get_unprofitable_route() -> Route:
+    """ The Osmosis mainnet arb route with fees pushed high 
+        enough that the cycle is unprofitable at the margin.
+    """
+    route, _ = get_routes()[1]
+    for pool in route.pools:
+        pool.set_fees(lp_fee=0.1, protocol_fee=0.0, fee_from_input=True)
+    return route
+
+
+def test_quick_marginal_unprofitable():
+    """ Tests that an unprofitable route fails the marginal check
+        and has no positive optimal amount in.
+    """
+    route = get_unprofitable_route()
+    assert route.quick_marginal_profitable() is False
+    route.calculate_and_set_optimal_amount_in()
+    assert route.optimal_amount_in <= 0
+
+
+def test_build_most_profitable_bundle_skips_unprofitable_route():
+    """ Tests that routes failing the marginal check are skipped
+        when building bundles and keep a profit of 0.
+    """
+    route = get_unprofitable_route()
+    bot = Bot(env_file_path="")
+    bot.account_balance = 10**12
+    bot.gas_fee = 0
+    
+    bundle = bot.build_most_profitable_bundle(
+                    transaction=SimpleNamespace(routes=[route]),
+                    contracts={})
+    
+    assert bundle is None
+    assert route.profit == 0
+    assert route.optimal_amount_in == 0
+    assert route.amount_in == 0
+
+
+def get_order_pools_cases():
+    """ Swaps against each pool of a ujuno -> A -> B -> ujuno route
+        and whether the route should end up reversed.
+    """
+    return [(0, "ujuno", False),
+            (0, "A", True),
+            (1, "A", False),
+            (1, "B", True),
+            (2, "B", False),
+            (2, "ujuno", True)]
+
+@pytest.mark.parametrize(argnames="swapped_index,output_denom,is_reversed", 
+                         argvalues=get_order_pools_cases())
+def test_order_pools(swapped_index: int, output_denom: str, is_reversed: bool):
+    denoms = [("ujuno", "A"), ("A", "B"), ("B", "ujuno")]
+    pools = []
+    for i, (token1_denom, token2_denom) in enumerate(denoms):
+        pool = Junoswap(contract_address=f"juno1pool{i}", protocol="junoswap")
+        pool.token1_denom = token1_denom
+        pool.token2_denom = token2_denom
+        pools.append(pool)
+    contracts = {pool.contract_address: pool for pool in pools}
+    
+    route = Route()
+    route.pools.extend(pools)
+    swap = Swap(sender="juno1sender",
+                contract_address=pools[swapped_index].contract_address,
+                input_denom="",
+                input_amount=0,
+                output_denom=output_denom)
+    route.order_pools(contracts=contracts, swap=swap, arb_denom="ujuno")
+    
+    expected = pools[::-1] if is_reversed else pools
+    assert [pool.contract_address for pool in route.pools] == [pool.contract_address for pool in expected]
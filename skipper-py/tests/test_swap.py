@@ -1,6 +1,8 @@
+import math
 import pytest
+from fractions import Fraction
 
-from src.swap import calculate_swap
+from src.swap import calculate_swap, calculate_amount_out, quantize_fee, FEE_SCALE
 
 # Tests from the WasmSwap contract repo: https://github.com/Wasmswap/wasmswap-contracts/blob/main/src/integration_test.rs
 @pytest.mark.parametrize(argnames="reserves_in, reserves_out, amount_in, lp_fee, protocol_fee, _amount_out, _new_reserves_in, _new_reserves_out, fee_from_input", 
@@ -46,6 +48,48 @@ def test_calculate_swap(reserves_in,
     assert new_reserves_in == _new_reserves_in
     assert new_reserves_out == _new_reserves_out
     
+
+@pytest.mark.parametrize(argnames="reserves_in, reserves_out, amount_in, lp_fee, protocol_fee, fee_from_input", 
+                         argvalues=[(100, 100, 10, 0.003, 0.0, True),
+                                    (100, 100, 10, 0.003, 0.0, False),
+                                    (100_000_000, 100_000_000, 10_000_000, 0.002, 0.001, True),
+                                    (100_000_000, 100_000_000, 10_000_000, 0.002, 0.001, False),
+                                    (1057419056388265, 300719637958981152, 80139134970352, .003, 0.0, True),
+                                    (1057419056388265, 300719637958981152, 80139134970352, .003, 0.0, False),
+                                    (100, 100, 0, 0.003, 0.0, True)
+                                    ])
+def test_calculate_amount_out(reserves_in, 
+                              reserves_out, 
+                              amount_in, 
+                              lp_fee, 
+                              protocol_fee, 
+                              fee_from_input):
+    """ Tests that calculate_amount_out with precomputed fixed point
+        fee multipliers is exact and agrees with calculate_swap, 
+        which drifts from the exact amount on large reserves.
+    """
+    if fee_from_input:
+        in_fee, out_fee = quantize_fee(1 - (lp_fee + protocol_fee)), FEE_SCALE
+    else:
+        in_fee, out_fee = FEE_SCALE, quantize_fee(1 - (lp_fee + protocol_fee))
+    amount_out, _, _ = calculate_swap(reserves_in, 
+                                      reserves_out, 
+                                      amount_in, 
+                                      lp_fee, 
+                                      protocol_fee, 
+                                      fee_from_input)
+    amount_in_after_fee = amount_in * Fraction(in_fee, FEE_SCALE)
+    exact_amount_out = math.floor(math.floor(reserves_out * amount_in_after_fee 
+                                             / (reserves_in + amount_in_after_fee))
+                                  * Fraction(out_fee, FEE_SCALE))
+    calculated_amount_out = calculate_amount_out(reserves_in, 
+                                                 reserves_out, 
+                                                 amount_in, 
+                                                 in_fee, 
+                                                 out_fee)
+    assert calculated_amount_out == exact_amount_out
+    assert calculated_amount_out == pytest.approx(amount_out, rel=1e-12)
+    
     
 # 35_548_942
 # 19_398_294
\ No newline at end of file